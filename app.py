@@ -6,15 +6,20 @@ import speech_recognition as sr
 import io
 from pydub import AudioSegment
 import pyttsx3
-import tempfile
 import requests
+import hashlib
+import json
+import concurrent.futures
+import streamlit.components.v1 as components
+from cancellation import start_job
+from chat_payload import build_payload, build_system_prompts
 
 # Load environment variables
 load_dotenv()
 
 # Hugging Face API configuration
 HF_API_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
-HF_API_URL = "https://router.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3"
+HF_API_URL = os.getenv("HF_API_URL", "https://router.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3")
 
 # Personality prompts
 PERSONALITIES = {
@@ -44,6 +49,16 @@ PERSONALITIES = {
     }
 }
 
+# Number of most recent messages rendered in full; older ones load on demand
+CHAT_WINDOW_SIZE = 20
+
+# Number of recent transcripts kept per session, keyed by recording hash
+TRANSCRIPT_CACHE_SIZE = 32
+
+# How often (seconds) a run waiting on an LLM or TTS request checks whether
+# it has been interrupted by new input
+CANCEL_POLL_INTERVAL = 0.05
+
 # Page configuration
 st.set_page_config(
     page_title="AI Chatbot",
@@ -97,6 +112,27 @@ if "conversation_turn_count" not in st.session_state:
 if "tts_speed" not in st.session_state:
     st.session_state.tts_speed = 180  # Default speaking rate (words per minute)
 
+if "chat_window" not in st.session_state:
+    st.session_state.chat_window = CHAT_WINDOW_SIZE
+
+if "last_audio_hash" not in st.session_state:
+    st.session_state.last_audio_hash = None
+
+if "transcript_cache" not in st.session_state:
+    st.session_state.transcript_cache = {}
+
+if "payload_cache" not in st.session_state:
+    st.session_state.payload_cache = {}
+
+if "autoplay_index" not in st.session_state:
+    st.session_state.autoplay_index = None  # Index of the reply that should play automatically
+
+if "playback_stop_count" not in st.session_state:
+    st.session_state.playback_stop_count = 0  # Number of times playback was asked to stop
+
+if "playback_stop_done" not in st.session_state:
+    st.session_state.playback_stop_done = 0  # Stop requests already shown by a completed run
+
 # Language configurations
 LANGUAGES = {
     "English": "en-US",
@@ -199,13 +235,87 @@ def get_command_help_text():
 • If not a command, your speech goes to the AI"""
     return help_text
 
+def stop_playback():
+    """Stop any reply that is playing and keep it from autoplaying again.
+
+    Playback is paused by render_playback_stop() at the top of the next run,
+    so callers rerun the app afterwards.
+    """
+    st.session_state.autoplay_index = None
+    st.session_state.playback_stop_count += 1
+
+def render_playback_stop():
+    """Pause playing replies while a stop request is pending.
+
+    The pause script is rendered above the chat on every run until one
+    completes, so it can't be thrown away by st.rerun() before it has run.
+    The reply set to autoplay (a new turn) is left playing. Returns the stop
+    count handled by this run.
+    """
+    stop_count = st.session_state.playback_stop_count
+    if stop_count == st.session_state.playback_stop_done:
+        return stop_count
+
+    keep_index = st.session_state.autoplay_index
+    selector = "audio" if keep_index is None else f'audio:not([data-reply="{keep_index}"])'
+
+    # HTML iframes share the app's origin, so they can reach its audio
+    # elements. The counter makes each request a new element so the script runs.
+    pause_html = f"""<script>
+    // stop {stop_count}
+    window.parent.document.querySelectorAll('{selector}').forEach((audio) => audio.pause());
+    </script>"""
+
+    # st.iframe replaces components.html in newer Streamlit releases
+    if hasattr(st, "iframe"):
+        st.iframe(pause_html, height=1)
+    else:
+        components.html(pause_html, height=0)
+
+    return stop_count
+
+def run_cancellable(func, *args):
+    """Run func on its own thread and wait for its result.
+
+    func receives a CancellableJob as its last argument. While waiting, this
+    polls session state, which is where Streamlit interrupts the run when new
+    input arrives (a new recording, a stop command or a chat message). The
+    job is then cancelled, which aborts its open requests and ends the thread.
+    """
+    future, job = start_job(func, *args)
+    try:
+        while True:
+            try:
+                return future.result(timeout=CANCEL_POLL_INTERVAL)
+            except concurrent.futures.TimeoutError:
+                # Session state access raises here if a rerun or stop is pending
+                st.session_state.get("messages")
+    finally:
+        if not future.done():
+            job.cancel()
+
+def synthesize_speech(text, lang_code, job):
+    """Synthesize MP3 audio with gTTS, returning None if cancelled.
+
+    Runs on a job thread, so it must not touch st.session_state.
+    """
+    from gtts import gTTS
+
+    # gTTS fetches long text in several parts; cancelling aborts the part in
+    # flight and no further parts are requested
+    tts = gTTS(text=text, lang=lang_code, slow=False)
+    audio_io = io.BytesIO()
+    for chunk in tts.stream():
+        if job.is_cancelled():
+            return None
+        audio_io.write(chunk)
+
+    return audio_io.getvalue()
+
 def generate_tts_audio(text, message_index, show_spinner=True):
     """Generate TTS audio for a message and store in session state using gTTS"""
     if message_index not in st.session_state.tts_audio:
         try:
-            from gtts import gTTS
-            import platform
-
             # Limit text length to avoid very long audio (max 1000 chars)
             if len(text) > 1000:
                 text_to_speak = text[:1000]
@@ -229,26 +339,10 @@ def generate_tts_audio(text, message_index, show_spinner=True):
             }
             lang_code = gtts_lang_map.get(current_lang, "en")
 
-            # Create temporary file for MP3
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_audio:
-                temp_mp3 = temp_audio.name
+            # Generate TTS audio on a worker so a new input can interrupt it
+            audio_bytes = run_cancellable(synthesize_speech, text_to_speak, lang_code)
 
-            # Generate TTS audio using gTTS
-            tts = gTTS(text=text_to_speak, lang=lang_code, slow=False)
-            tts.save(temp_mp3)
-
-            # Read the generated audio file
-            with open(temp_mp3, 'rb') as audio_file:
-                audio_bytes = audio_file.read()
-
-            # Clean up temporary file
-            try:
-                if os.path.exists(temp_mp3):
-                    os.unlink(temp_mp3)
-            except Exception:
-                pass
-
-            if len(audio_bytes) > 1000:  # Should be larger than just a header
+            if audio_bytes and len(audio_bytes) > 1000:  # Should be larger than just a header
                 st.session_state.tts_audio[message_index] = (audio_bytes, 'mp3')
             else:
                 st.session_state.tts_audio[message_index] = None
@@ -258,72 +352,102 @@ def generate_tts_audio(text, message_index, show_spinner=True):
 
     return st.session_state.tts_audio.get(message_index)
 
+def get_audio_hash(audio_bytes):
+    """Return a content hash identifying a recording"""
+    return hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+
+def transcribe_audio(audio_bytes, audio_hash):
+    """Transcribe a WAV recording, reusing the cached transcript for identical clips.
+
+    Returns None if the clip is too short to contain speech, and an empty
+    string if no speech could be recognized.
+    """
+    # Transcripts depend on the recognition language as well as the audio
+    cache_key = (audio_hash, st.session_state.language)
+    transcript_cache = st.session_state.transcript_cache
+    if cache_key in transcript_cache:
+        return transcript_cache[cache_key]
+
+    # Check if audio is too short (likely silence)
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="wav")
+
+    if len(audio) < 500:  # milliseconds
+        text = None
+    else:
+        # Export as WAV for speech recognition
+        wav_io = io.BytesIO()
+        audio.export(wav_io, format="wav")
+        wav_io.seek(0)
+
+        # Use speech recognition
+        recognizer = sr.Recognizer()
+        # Adjust for ambient noise
+        with sr.AudioFile(wav_io) as source:
+            recognizer.adjust_for_ambient_noise(source, duration=0.2)
+            audio_data = recognizer.record(source)
+
+        try:
+            # Use the selected language for recognition
+            text = recognizer.recognize_google(audio_data, language=st.session_state.language)
+        except sr.UnknownValueError:
+            text = ""
+
+    # Drop the oldest transcript once the cache is full
+    if len(transcript_cache) >= TRANSCRIPT_CACHE_SIZE:
+        transcript_cache.pop(next(iter(transcript_cache)))
+    transcript_cache[cache_key] = text
+
+    return text
+
+@st.cache_resource
+def get_system_prompts():
+    """Return the system prompts for every personality and language, built once per process"""
+    return build_system_prompts(PERSONALITIES, LANGUAGES)
+
+def request_completion(body, job):
+    """POST a prepared payload to the Hugging Face API and return (status code, body).
+
+    Runs on a job thread. Cancelling the job aborts the request even while
+    it is still waiting for the response.
+    """
+    headers = {
+        "Authorization": f"Bearer {HF_API_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+    with requests.post(HF_API_URL, headers=headers, data=body, stream=True, timeout=30) as response:
+        chunks = []
+        for chunk in response.iter_content(chunk_size=4096):
+            if job.is_cancelled():
+                return None, b""
+            chunks.append(chunk)
+
+        return response.status_code, b"".join(chunks)
+
 # Function to generate AI response
 def generate_response(prompt):
-    """Generate AI response for the given prompt using Hugging Face API"""
-    try:
-        # Build conversation history with system prompt
-        system_prompt = PERSONALITIES[st.session_state.personality]["system_prompt"]
-
-        # Add language instruction to system prompt
-        current_lang = st.session_state.language
-        language_names = {
-            "en-US": "English",
-            "es-ES": "Spanish",
-            "fr-FR": "French",
-            "de-DE": "German",
-            "zh-CN": "Chinese (Mandarin)",
-            "ja-JP": "Japanese",
-            "ko-KR": "Korean",
-            "it-IT": "Italian",
-            "pt-BR": "Portuguese",
-            "ru-RU": "Russian"
-        }
-        language_instruction = f"\n\nIMPORTANT: Please respond in {language_names.get(current_lang, 'English')}."
-        system_prompt_with_lang = system_prompt + language_instruction
-
-        # Create conversation messages for HuggingFace API
-        messages = []
-
-        # Add system prompt as first message
-        messages.append({
-            "role": "system",
-            "content": system_prompt_with_lang
-        })
-
-        # Add conversation history
-        for msg in st.session_state.messages[:-1]:  # Exclude the latest user message
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-
-        # Add current user message
-        messages.append({
-            "role": "user",
-            "content": prompt
-        })
-
-        # Call Hugging Face Inference API
-        headers = {
-            "Authorization": f"Bearer {HF_API_TOKEN}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "inputs": messages,
-            "parameters": {
-                "max_new_tokens": 500,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "return_full_text": False
-            }
-        }
-
-        response = requests.post(HF_API_URL, headers=headers, json=payload, timeout=30)
+    """Generate AI response for the given prompt using Hugging Face API.
 
-        if response.status_code == 200:
-            result = response.json()
+    The prompt is not in st.session_state.messages yet; callers add it
+    together with the reply, so an interrupted turn leaves no trace.
+    """
+    try:
+        # Look up the precomputed system prompt for the current personality and language
+        system_prompt = get_system_prompts()[(st.session_state.personality, st.session_state.language)]
+
+        # Only messages added since the previous turn are serialized
+        body = build_payload(
+            st.session_state.payload_cache,
+            system_prompt,
+            st.session_state.messages,
+            prompt
+        )
+
+        # Call Hugging Face Inference API on a worker so a new input can interrupt it
+        status_code, content = run_cancellable(request_completion, body.encode("utf-8"))
+
+        if status_code == 200:
+            result = json.loads(content)
             if isinstance(result, list) and len(result) > 0:
                 return result[0].get("generated_text", "Sorry, I couldn't generate a response.")
             elif isinstance(result, dict):
@@ -331,7 +455,7 @@ def generate_response(prompt):
             else:
                 return "Sorry, I couldn't generate a response."
         else:
-            return f"Error: {response.status_code} - {response.text}"
+            return f"Error: {status_code} - {content.decode('utf-8', errors='replace')}"
 
     except Exception as e:
         return f"Error: {str(e)}"
@@ -352,6 +476,7 @@ with st.sidebar:
     if selected_personality != st.session_state.personality:
         st.session_state.personality = selected_personality
         st.session_state.messages = []  # Clear chat history when personality changes
+        st.session_state.chat_window = CHAT_WINDOW_SIZE
         st.rerun()
 
     # Display personality info in compact format
@@ -436,6 +561,7 @@ with st.sidebar:
         if st.button("🗑️ Clear\nChat", use_container_width=True, help="Clear conversation history"):
             st.session_state.messages = []
             st.session_state.tts_audio = {}
+            st.session_state.chat_window = CHAT_WINDOW_SIZE
             st.rerun()
 
     with col2:
@@ -474,9 +600,31 @@ if st.session_state.language != "en-US" and len(st.session_state.messages) == 0:
         st.info(f"**{greeting}**\n\nThe AI will respond in {current_lang_name}, and voice output will use a native {current_lang_name} speaker.")
 
 # Display chat messages
-chat_container = st.container()
-with chat_container:
-    for idx, message in enumerate(st.session_state.messages):
+def load_earlier_messages():
+    """Widen the chat window to include the next batch of older messages"""
+    st.session_state.chat_window += CHAT_WINDOW_SIZE
+
+def retry_tts_audio(message_index):
+    """Drop a failed TTS entry so the audio is regenerated on the next render"""
+    st.session_state.tts_audio.pop(message_index, None)
+
+@st.fragment
+def render_chat_history():
+    """Render the most recent chat messages, collapsing older ones behind a button"""
+    messages = st.session_state.messages
+    window_start = max(len(messages) - st.session_state.chat_window, 0)
+
+    # Older messages are not rendered at all until the user asks for them
+    if window_start > 0:
+        st.button(
+            f"⬆️ Load earlier messages ({window_start} hidden)",
+            key="load_earlier",
+            use_container_width=True,
+            on_click=load_earlier_messages
+        )
+
+    for idx in range(window_start, len(messages)):
+        message = messages[idx]
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
@@ -503,11 +651,12 @@ with chat_container:
                     audio_bytes, audio_format = audio_result
                     st.markdown("**🔊 Audio Response**")
 
-                    # Use HTML audio with autoplay for automatic playback
+                    # Use HTML audio with autoplay for the newest reply only
                     import base64
                     audio_b64 = base64.b64encode(audio_bytes).decode()
+                    autoplay = "autoplay" if idx == st.session_state.autoplay_index else ""
                     audio_html = f"""
-                    <audio controls autoplay style="width: 100%;">
+                    <audio controls {autoplay} data-reply="{idx}" style="width: 100%;">
                         <source src="data:audio/{audio_format};base64,{audio_b64}" type="audio/{audio_format}">
                     </audio>
                     """
@@ -523,12 +672,22 @@ with chat_container:
 
                 elif idx in st.session_state.tts_audio:
                     st.error("❌ Audio generation failed")
-                    if st.button(f"🔄 Retry Audio", key=f"retry_{idx}", help="Click to retry audio generation"):
-                        del st.session_state.tts_audio[idx]
-                        st.rerun()
+                    st.button(
+                        f"🔄 Retry Audio",
+                        key=f"retry_{idx}",
+                        help="Click to retry audio generation",
+                        on_click=retry_tts_audio,
+                        args=(idx,)
+                    )
 
             st.markdown("")  # Add spacing
 
+handled_playback_stop = render_playback_stop()
+
+chat_container = st.container()
+with chat_container:
+    render_chat_history()
+
 # Input section (always visible at bottom)
 st.markdown("---")
 
@@ -539,27 +698,19 @@ if len(st.session_state.messages) == 0:
     else:
         st.info("💬 **Get Started:** Type a message below or use voice input to chat with the AI assistant!")
 
-st.markdown("### 🎤 Voice Input")
-
-# Show quick response mode status
-if st.session_state.quick_response_mode and len(st.session_state.messages) > 0:
-    turns = st.session_state.conversation_turn_count
-    st.caption(f"🎙️ Quick Response Mode | Turn: {turns}")
+def reset_transcription_status():
+    """Clear the voice input status so the recorder prompt is shown again"""
+    st.session_state.transcription_status = ""
+    st.session_state.error_message = ""
 
-# Create responsive columns for better layout
-col_recorder, col_status = st.columns([1, 2])
-with col_recorder:
-    # Audio recorder
-    audio_bytes = audio_recorder(
-        text="",
-        recording_color="#e74c3c",
-        neutral_color="#3498db",
-        icon_name="microphone",
-        icon_size="2x",
-        key="audio_recorder"
-    )
+@st.fragment
+def render_voice_status():
+    """Render the voice input status and its Retry/Dismiss buttons.
 
-with col_status:
+    Those buttons rerun only this section. The recorder itself stays outside
+    any fragment: a widget change inside a fragment never interrupts a
+    running script, and a new recording has to cut off the current reply.
+    """
     # Status display with better formatting
     if st.session_state.transcription_status == "processing":
         st.warning("⏳ **Processing your speech...**")
@@ -569,137 +720,134 @@ with col_status:
         st.error(f"❌ **Error**\n\n{st.session_state.error_message}")
         col_retry1, col_retry2 = st.columns([1, 1])
         with col_retry1:
-            if st.button("🔄 Retry", key="retry_voice", use_container_width=True):
-                st.session_state.transcription_status = ""
-                st.session_state.error_message = ""
-                st.rerun()
+            st.button("🔄 Retry", key="retry_voice", use_container_width=True, on_click=reset_transcription_status)
         with col_retry2:
-            if st.button("✖️ Dismiss", key="dismiss_voice", use_container_width=True):
-                st.session_state.transcription_status = ""
-                st.session_state.error_message = ""
-                st.rerun()
+            st.button("✖️ Dismiss", key="dismiss_voice", use_container_width=True, on_click=reset_transcription_status)
     elif st.session_state.transcription_status == "permission_denied":
         st.error("🔒 **Microphone access denied**")
         st.info("Allow microphone access in browser settings")
-        if st.button("🔄 Try Again", key="retry_permission", use_container_width=True):
-            st.session_state.transcription_status = ""
-            st.rerun()
+        st.button("🔄 Try Again", key="retry_permission", use_container_width=True, on_click=reset_transcription_status)
     elif st.session_state.transcription_status == "no_speech":
         st.warning("🔇 **No speech detected**")
         st.caption("Speak clearly after clicking microphone")
-        if st.button("🔄 Try Again", key="retry_no_speech", use_container_width=True):
-            st.session_state.transcription_status = ""
-            st.rerun()
+        st.button("🔄 Try Again", key="retry_no_speech", use_container_width=True, on_click=reset_transcription_status)
     else:
         st.info("💡 **Click microphone, then speak**")
         st.caption("Try voice commands like 'clear chat'")
 
+st.markdown("### 🎤 Voice Input")
+
+# Show quick response mode status
+if st.session_state.quick_response_mode and len(st.session_state.messages) > 0:
+    turns = st.session_state.conversation_turn_count
+    st.caption(f"🎙️ Quick Response Mode | Turn: {turns}")
+
+# Create responsive columns for better layout
+col_recorder, col_status = st.columns([1, 2])
+with col_recorder:
+    # Audio recorder
+    audio_bytes = audio_recorder(
+        text="",
+        recording_color="#e74c3c",
+        neutral_color="#3498db",
+        icon_name="microphone",
+        icon_size="2x",
+        key="audio_recorder"
+    )
+
 # Process audio if new recording is available
-if audio_bytes:
-    # Check if this is a new recording by comparing with previous
-    if "last_audio_len" not in st.session_state:
-        st.session_state.last_audio_len = 0
-
-    current_len = len(audio_bytes)
-    if current_len != st.session_state.last_audio_len:
-        st.session_state.last_audio_len = current_len
-        st.session_state.transcription_status = "processing"
-        st.rerun()
+audio_hash = get_audio_hash(audio_bytes) if audio_bytes else None
+if audio_hash and audio_hash != st.session_state.last_audio_hash:
+    # Identify recordings by content so clips of equal length are not missed
+    st.session_state.last_audio_hash = audio_hash
+    # Barge-in: a new utterance stops the reply that is currently playing.
+    # Rerun so playback is paused before transcription starts.
+    stop_playback()
+    st.session_state.transcription_status = "processing"
+    st.rerun()
+
+with col_status:
+    render_voice_status()
 
-# Handle transcription after rerun
+# Handle transcription of the new recording
 if st.session_state.transcription_status == "processing" and audio_bytes:
     with st.spinner("🎧 Transcribing your speech..."):
         try:
-            # Check if audio is too short (likely silence)
-            audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="wav")
+            text = transcribe_audio(audio_bytes, audio_hash)
 
-            # If audio is very short (less than 0.5 seconds), it's likely just noise
-            if len(audio) < 500:  # milliseconds
+            if text is None:
+                # If audio is very short (less than 0.5 seconds), it's likely just noise
                 st.session_state.transcription_status = "no_speech"
                 st.warning("🔇 Recording too short. Please speak clearly after clicking the microphone.")
+            elif text.strip():
+                # Check for voice commands
+                command_type, command_param = process_voice_command(text)
+
+                if command_type == "clear_chat":
+                    st.session_state.messages = []
+                    st.session_state.chat_window = CHAT_WINDOW_SIZE
+                    st.session_state.transcription_status = "ready"
+                    st.session_state.command_executed = True
+                    st.toast("🎤 Voice Command: Cleared chat history!", icon="🗑️")
+                    st.rerun()
+                elif command_type == "change_personality":
+                    if command_param:
+                        st.session_state.personality = command_param
+                        st.session_state.messages = []
+                        st.session_state.chat_window = CHAT_WINDOW_SIZE
+                        st.session_state.transcription_status = "ready"
+                        st.session_state.command_executed = True
+                        st.toast(f"🎤 Voice Command: Switched to {command_param}!", icon="🎭")
+                        st.rerun()
+                    else:
+                        st.session_state.voice_text = text
+                        st.session_state.transcription_status = "ready"
+                        st.success(f"✅ **Transcribed:** {text}")
+                elif command_type == "help":
+                    st.session_state.transcription_status = "ready"
+                    st.session_state.command_executed = True
+                    st.info(get_command_help_text())
+                elif command_type == "speed_up":
+                    st.session_state.tts_speed = min(st.session_state.tts_speed + 25, 300)
+                    st.session_state.tts_audio = {}  # Clear cache to regenerate with new speed
+                    st.session_state.transcription_status = "ready"
+                    st.session_state.command_executed = True
+                    st.success(f"🎤 **Voice Command:** Speaking speed increased to {st.session_state.tts_speed} wpm!")
+                elif command_type == "slow_down":
+                    st.session_state.tts_speed = max(st.session_state.tts_speed - 25, 100)
+                    st.session_state.tts_audio = {}  # Clear cache
+                    st.session_state.transcription_status = "ready"
+                    st.session_state.command_executed = True
+                    st.success(f"🎤 **Voice Command:** Speaking speed decreased to {st.session_state.tts_speed} wpm!")
+                elif command_type == "normal_speed":
+                    st.session_state.tts_speed = 180
+                    st.session_state.tts_audio = {}  # Clear cache
+                    st.session_state.transcription_status = "ready"
+                    st.session_state.command_executed = True
+                    st.success(f"🎤 **Voice Command:** Speaking speed reset to normal (180 wpm)!")
+                elif command_type == "stop_audio":
+                    stop_playback()
+                    st.session_state.transcription_status = "ready"
+                    st.session_state.command_executed = True
+                    st.toast("🎤 Voice Command: Stopped audio playback", icon="🔇")
+                    st.rerun()
+                else:
+                    # Normal transcription
+                    st.session_state.voice_text = text
+                    st.session_state.transcription_status = "ready"
+                    st.success(f"✅ **Transcribed:** {text}")
+            else:
+                # Speech was unintelligible
+                st.session_state.transcription_status = "no_speech"
+                st.warning("🔇 No clear speech detected. Please try again and speak more clearly.")
+        except sr.RequestError as e:
+            # API request failed
+            if "permission" in str(e).lower() or "denied" in str(e).lower():
+                st.session_state.transcription_status = "permission_denied"
             else:
-                # Export as WAV for speech recognition
-                wav_io = io.BytesIO()
-                audio.export(wav_io, format="wav")
-                wav_io.seek(0)
-
-                # Use speech recognition
-                recognizer = sr.Recognizer()
-                # Adjust for ambient noise
-                with sr.AudioFile(wav_io) as source:
-                    recognizer.adjust_for_ambient_noise(source, duration=0.2)
-                    audio_data = recognizer.record(source)
-
-                    try:
-                        # Use the selected language for recognition
-                        text = recognizer.recognize_google(audio_data, language=st.session_state.language)
-                        if text and text.strip():
-                            # Check for voice commands
-                            command_type, command_param = process_voice_command(text)
-
-                            if command_type == "clear_chat":
-                                st.session_state.messages = []
-                                st.session_state.transcription_status = "ready"
-                                st.session_state.command_executed = True
-                                st.success(f"🎤 **Voice Command:** Cleared chat history!")
-                                st.balloons()
-                            elif command_type == "change_personality":
-                                if command_param:
-                                    st.session_state.personality = command_param
-                                    st.session_state.messages = []
-                                    st.session_state.transcription_status = "ready"
-                                    st.session_state.command_executed = True
-                                    st.success(f"🎤 **Voice Command:** Switched to {command_param}!")
-                                    st.balloons()
-                                else:
-                                    st.session_state.voice_text = text
-                                    st.session_state.transcription_status = "ready"
-                                    st.success(f"✅ **Transcribed:** {text}")
-                            elif command_type == "help":
-                                st.session_state.transcription_status = "ready"
-                                st.session_state.command_executed = True
-                                st.info(get_command_help_text())
-                            elif command_type == "speed_up":
-                                st.session_state.tts_speed = min(st.session_state.tts_speed + 25, 300)
-                                st.session_state.tts_audio = {}  # Clear cache to regenerate with new speed
-                                st.session_state.transcription_status = "ready"
-                                st.session_state.command_executed = True
-                                st.success(f"🎤 **Voice Command:** Speaking speed increased to {st.session_state.tts_speed} wpm!")
-                            elif command_type == "slow_down":
-                                st.session_state.tts_speed = max(st.session_state.tts_speed - 25, 100)
-                                st.session_state.tts_audio = {}  # Clear cache
-                                st.session_state.transcription_status = "ready"
-                                st.session_state.command_executed = True
-                                st.success(f"🎤 **Voice Command:** Speaking speed decreased to {st.session_state.tts_speed} wpm!")
-                            elif command_type == "normal_speed":
-                                st.session_state.tts_speed = 180
-                                st.session_state.tts_audio = {}  # Clear cache
-                                st.session_state.transcription_status = "ready"
-                                st.session_state.command_executed = True
-                                st.success(f"🎤 **Voice Command:** Speaking speed reset to normal (180 wpm)!")
-                            elif command_type == "stop_audio":
-                                st.session_state.transcription_status = "ready"
-                                st.session_state.command_executed = True
-                                st.warning("🎤 **Voice Command:** Audio playback cannot be stopped (browser limitation)")
-                            else:
-                                # Normal transcription
-                                st.session_state.voice_text = text
-                                st.session_state.transcription_status = "ready"
-                                st.success(f"✅ **Transcribed:** {text}")
-                        else:
-                            st.session_state.transcription_status = "no_speech"
-                    except sr.UnknownValueError:
-                        # Speech was unintelligible
-                        st.session_state.transcription_status = "no_speech"
-                        st.warning("🔇 No clear speech detected. Please try again and speak more clearly.")
-                    except sr.RequestError as e:
-                        # API request failed
-                        if "permission" in str(e).lower() or "denied" in str(e).lower():
-                            st.session_state.transcription_status = "permission_denied"
-                        else:
-                            st.session_state.transcription_status = "error"
-                            st.session_state.error_message = "**Connection error** - Please check your internet and try again"
-                            st.error(f"❌ {st.session_state.error_message}")
+                st.session_state.transcription_status = "error"
+                st.session_state.error_message = "**Connection error** - Please check your internet and try again"
+                st.error(f"❌ {st.session_state.error_message}")
 
         except PermissionError:
             st.session_state.transcription_status = "permission_denied"
@@ -725,18 +873,19 @@ if st.session_state.voice_text:
         prompt = st.session_state.voice_text
         st.session_state.voice_text = ""
         st.session_state.transcription_status = ""
-        st.session_state.conversation_turn_count += 1
-
-        # Add user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        stop_playback()
 
-        # Generate and add assistant response
+        # Add the user message only together with its reply, so an
+        # interrupted turn doesn't leave an unanswered message behind
         response_text = generate_response(prompt)
+        st.session_state.messages.append({"role": "user", "content": prompt})
         st.session_state.messages.append({"role": "assistant", "content": response_text})
+        st.session_state.conversation_turn_count += 1
 
         # Generate TTS audio for the new message
         message_index = len(st.session_state.messages) - 1
         generate_tts_audio(response_text, message_index)
+        st.session_state.autoplay_index = message_index
 
         # In Quick Response Mode, show reminder to continue
         if st.session_state.quick_response_mode:
@@ -744,6 +893,7 @@ if st.session_state.voice_text:
 
         st.rerun()
 
+
 # Regular chat input
 st.markdown("### 💬 Text Input")
 if prompt := st.chat_input("Type your message here... or use voice input above 👆"):
@@ -751,24 +901,28 @@ if prompt := st.chat_input("Type your message here... or use voice input above 
     st.session_state.voice_text = ""
     st.session_state.transcription_status = ""
     st.session_state.error_message = ""
-
-    # Add user message to chat history
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    stop_playback()
 
     # Generate AI response
     with st.spinner("🤔 Thinking..."):
         response_text = generate_response(prompt)
 
-        # Add assistant response to chat history
+        # Add the user message only together with its reply, so an
+        # interrupted turn doesn't leave an unanswered message behind
+        st.session_state.messages.append({"role": "user", "content": prompt})
         st.session_state.messages.append({"role": "assistant", "content": response_text})
 
         # Generate TTS audio for the new message
         message_index = len(st.session_state.messages) - 1
         with st.spinner("🎵 Generating audio..."):
             generate_tts_audio(response_text, message_index, show_spinner=False)
+        st.session_state.autoplay_index = message_index
 
     st.rerun()
 
 # Footer
 st.markdown("---")
 st.markdown("*Powered by Google Gemini 2.5 Flash*")
+
+# This run completed, so its pause script stays on the page
+st.session_state.playback_stop_done = handled_playback_stop
@@ -0,0 +1,63 @@
+"""Microbenchmark: chat payload construction time against history length.
+
+Compares rebuilding and re-encoding the full message list every turn (the
+previous approach) with the incremental builder in chat_payload.py.
+
+Usage:
+    python benchmarks/payload_benchmark.py
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_payload import GENERATION_PARAMETERS, build_payload
+
+HISTORY_LENGTHS = [10, 100, 1000, 5000]
+SYSTEM_PROMPT = "You are a helpful and friendly AI assistant.\n\nIMPORTANT: Please respond in English."
+MESSAGE_TEXT = "This is a typical chat message of moderate length, about one or two sentences. " * 3
+
+def make_history(length):
+    """Build a fake alternating user/assistant conversation"""
+    roles = ["user", "assistant"]
+    return [{"role": roles[i % 2], "content": f"{i}: {MESSAGE_TEXT}"} for i in range(length)]
+
+def full_rebuild(history, prompt):
+    """Previous approach: copy every message into a new list and encode it all"""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    for msg in history:
+        messages.append({"role": msg["role"], "content": msg["content"]})
+    messages.append({"role": "user", "content": prompt})
+    return json.dumps({"inputs": messages, "parameters": GENERATION_PARAMETERS})
+
+def bench(length, repeat=5):
+    """Return best-of-`repeat` per-turn times (seconds) for both approaches"""
+    history = make_history(length)
+    prompt = "What should I do next?"
+
+    rebuild_time = min(timeit.repeat(lambda: full_rebuild(history, prompt), number=20, repeat=repeat)) / 20
+
+    # Warm the cache with everything except the newest turn, then time one new turn
+    def incremental_turn():
+        cache = warm_cache.copy()
+        build_payload(cache, SYSTEM_PROMPT, history, prompt)
+
+    warm_cache = {}
+    build_payload(warm_cache, SYSTEM_PROMPT, history[:-2], prompt)
+    incremental_time = min(timeit.repeat(incremental_turn, number=20, repeat=repeat)) / 20
+
+    # Sanity check: both approaches produce the same request
+    assert json.loads(full_rebuild(history, prompt)) == json.loads(build_payload({}, SYSTEM_PROMPT, history, prompt))
+
+    return rebuild_time, incremental_time
+
+def main():
+    print(f"{'history':>8}  {'full rebuild':>14}  {'incremental':>12}  {'speedup':>8}")
+    for length in HISTORY_LENGTHS:
+        rebuild_time, incremental_time = bench(length)
+        print(f"{length:>8}  {rebuild_time * 1e3:>11.3f} ms  {incremental_time * 1e3:>9.3f} ms  {rebuild_time / incremental_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
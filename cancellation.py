@@ -0,0 +1,83 @@
+"""Cancellable background jobs for LLM and TTS requests.
+
+Each job runs on its own thread, so no session waits for another's
+requests. Every HTTP connection that urllib3 (and therefore requests and
+gTTS) opens on a job's thread is recorded. Cancelling the job shuts those
+sockets down, which aborts a blocked read straight away instead of
+leaving the thread waiting for the request timeout.
+"""
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3.connection
+
+_current = threading.local()
+
+class CancellableJob:
+    """Cancellation state and open connections of one background job"""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def is_cancelled(self):
+        """Return True once the job has been cancelled"""
+        return self._cancelled.is_set()
+
+    def track(self, connection):
+        """Remember a connection opened by this job, aborting it if the job is already cancelled"""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._connections.append(connection)
+                return
+        _abort(connection)
+
+    def cancel(self):
+        """Cancel the job and abort any request it is waiting on"""
+        with self._lock:
+            self._cancelled.set()
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            _abort(connection)
+
+def _abort(connection):
+    """Shut down a connection's socket so reads on other threads return immediately"""
+    sock = connection.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # Already closed
+
+def _tracked(connect):
+    """Wrap urllib3's connect() to register new connections with the current job"""
+    def tracked_connect(self):
+        connect(self)
+        job = getattr(_current, "job", None)
+        if job is not None:
+            job.track(self)
+    tracked_connect.cancellation_tracked = True
+    return tracked_connect
+
+# Patch once per process; Streamlit may re-import this module when it changes
+for _connection_class in (urllib3.connection.HTTPConnection, urllib3.connection.HTTPSConnection):
+    if not getattr(_connection_class.connect, "cancellation_tracked", False):
+        _connection_class.connect = _tracked(_connection_class.connect)
+
+def _run(job, func, args):
+    _current.job = job
+    try:
+        return func(*args, job)
+    finally:
+        _current.job = None
+
+def start_job(func, *args):
+    """Run func(*args, job) on a new thread and return (future, job)"""
+    job = CancellableJob()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-job")
+    future = executor.submit(_run, job, func, args)
+    # The thread exits as soon as this job is done
+    executor.shutdown(wait=False)
+    return future, job
@@ -0,0 +1,67 @@
+"""Request payload construction for the Hugging Face chat API.
+
+The conversation history is serialized once and kept as a JSON prefix, so
+each new turn only has to encode the newest messages instead of the
+whole history.
+"""
+import json
+from types import MappingProxyType
+
+# Generation settings sent with every request
+GENERATION_PARAMETERS = {
+    "max_new_tokens": 500,
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "return_full_text": False
+}
+
+_PARAMETERS_JSON = json.dumps(GENERATION_PARAMETERS)
+
+def build_system_prompts(personalities, languages):
+    """Precompute the system prompt for every (personality, language code) pair"""
+    prompts = {}
+    for personality, info in personalities.items():
+        for language_name, language_code in languages.items():
+            language_instruction = f"\n\nIMPORTANT: Please respond in {language_name}."
+            prompts[(personality, language_code)] = info["system_prompt"] + language_instruction
+    return MappingProxyType(prompts)
+
+def serialize_message(role, content):
+    """Encode a single chat message as JSON"""
+    return json.dumps({"role": role, "content": content})
+
+def build_payload(cache, system_prompt, history, prompt):
+    """Return the JSON request body for a new user prompt.
+
+    `cache` is a dict owned by the caller (one per session) that holds the
+    serialized system prompt and history from previous turns. Only messages
+    added to `history` since the last call are encoded. The cache is rebuilt
+    when the system prompt changes or the history no longer extends the one
+    it was built from (e.g. after the chat was cleared).
+    """
+    count = cache.get("count", 0)
+    is_valid = (
+        cache.get("system_prompt") == system_prompt
+        and count <= len(history)
+        and (count == 0 or history[count - 1] is cache.get("last_message"))
+    )
+
+    if not is_valid:
+        cache.clear()
+        cache["system_prompt"] = system_prompt
+        cache["prefix"] = '{"inputs": [' + serialize_message("system", system_prompt)
+        count = 0
+
+    new_messages = history[count:]
+    if new_messages:
+        cache["prefix"] += "".join(
+            ", " + serialize_message(msg["role"], msg["content"]) for msg in new_messages
+        )
+        cache["count"] = len(history)
+        cache["last_message"] = history[-1]
+
+    return (
+        cache["prefix"]
+        + ", " + serialize_message("user", prompt)
+        + '], "parameters": ' + _PARAMETERS_JSON + "}"
+    )
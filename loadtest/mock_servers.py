@@ -0,0 +1,102 @@
+"""Local mock STT, LLM and TTS endpoints for load testing.
+
+All three services share one threaded HTTP server:
+
+    POST /llm  - Hugging Face style completion, returns [{"generated_text": ...}]
+    POST /stt  - WAV upload, returns {"transcript": ...}
+    GET  /tts  - returns a fake MP3 payload for one text part
+    POST /tts  - the same payload in gTTS's response format, for pointing gTTS itself here
+
+Each endpoint sleeps for a configurable latency to mimic the real service.
+Run this file directly to serve them from a separate process:
+
+    python loadtest/mock_servers.py --port 8000 --llm-latency 0.5
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOCK_REPLY = (
+    "Here is a detailed answer to your question. It covers the main idea, a short example "
+    "and a practical tip you can try right away. Let me know if you'd like me to go deeper "
+    "into any part of it or explain it in a different way."
+)
+MOCK_TRANSCRIPT = "Tell me something interesting about the ocean"
+MOCK_MP3 = b"\xff\xfb\x90\x64" + b"\x00" * 4092  # MP3 frame header followed by silence
+# One batchexecute line as gTTS parses it, carrying MOCK_MP3
+MOCK_GTTS_RESPONSE = (
+    ')]}\'\n\n[["wrb.fr","jQ1olc","[\\"' + base64.b64encode(MOCK_MP3).decode() + '\\"]",null,null,null,"generic"]]\n'
+).encode()
+
+def make_handler(latencies):
+    """Create a request handler class using the given per-endpoint latencies (seconds)"""
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            # Drain the request body so keep-alive connections stay usable
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+
+            if self.path == "/llm":
+                time.sleep(latencies["llm"])
+                self._reply(json.dumps([{"generated_text": MOCK_REPLY}]).encode(), "application/json")
+            elif self.path == "/stt":
+                time.sleep(latencies["stt"])
+                self._reply(json.dumps({"transcript": MOCK_TRANSCRIPT}).encode(), "application/json")
+            elif self.path == "/tts":
+                time.sleep(latencies["tts"])
+                self._reply(MOCK_GTTS_RESPONSE, "application/json")
+            else:
+                self.send_error(404)
+
+        def do_GET(self):
+            if self.path.startswith("/tts"):
+                time.sleep(latencies["tts"])
+                self._reply(MOCK_MP3, "audio/mpeg")
+            else:
+                self.send_error(404)
+
+        def _reply(self, body, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep load test output readable
+
+    return MockHandler
+
+def start_mock_servers(llm_latency=0.2, stt_latency=0.1, tts_latency=0.05, port=0):
+    """Start the mock services on a background thread and return (server, base URL)"""
+    latencies = {"llm": llm_latency, "stt": stt_latency, "tts": tts_latency}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latencies))
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, name="mock-servers", daemon=True)
+    thread.start()
+
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock STT, LLM and TTS endpoints")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Mock LLM latency in seconds")
+    parser.add_argument("--stt-latency", type=float, default=0.1, help="Mock speech recognition latency in seconds")
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="Mock TTS latency per text part in seconds")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_servers(args.llm_latency, args.stt_latency, args.tts_latency, args.port)
+    # run_loadtest.py reads the URL from this line
+    print(f"Mock STT/LLM/TTS servers listening on {base_url} (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,351 @@
+"""Load test: simulate many concurrent voice chat sessions in one process.
+
+Each simulated session drives app.py through Streamlit's testing API
+(AppTest). It replays WAV fixtures through the transcription branch and
+sends each transcript with the "Send Voice Text" button, then submits
+typed chat messages through the chat input. Speech recognition, the LLM
+and gTTS are pointed at mock servers (see mock_servers.py) running in a
+separate process, so the numbers reflect the app's own overhead plus the
+configured mock latencies, and CPU and RSS are measured for the app only.
+
+For every session count it reports throughput, tail latency per turn,
+CPU utilization and peak RSS, to find where the scaling curve bends.
+
+AppTest is built to run one test at a time. Running sessions concurrently
+relies on patching Streamlit internals (see install_mocks), so the harness
+only runs on SUPPORTED_STREAMLIT_VERSION.
+
+Usage:
+    python loadtest/run_loadtest.py --sessions 1,10,50,100,200
+    python loadtest/run_loadtest.py --fixtures path/to/wavs --json results.json
+    python loadtest/run_loadtest.py --mock-url http://127.0.0.1:8000
+"""
+import argparse
+import concurrent.futures
+import glob
+import io
+import json
+import math
+import os
+import resource
+import statistics
+import struct
+import subprocess
+import sys
+import threading
+import time
+import wave
+from unittest import mock
+
+import requests
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(LOADTEST_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+MOCK_SERVERS_PATH = os.path.join(LOADTEST_DIR, "mock_servers.py")
+
+# The Streamlit release whose internals install_mocks() was written against
+SUPPORTED_STREAMLIT_VERSION = "1.66.0"
+SEND_VOICE_LABEL = "📤 Send Voice Text"
+DEFAULT_CHAT_INPUTS = [
+    "What's a good way to start learning a new language?",
+    "Can you give me a quick summary of that?",
+    "Thanks! One more tip please."
+]
+
+def make_tone_wav(frequency, duration=1.0, sample_rate=16000):
+    """Synthesize a mono 16-bit WAV tone, used when no fixtures are given"""
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+        for i in range(int(duration * sample_rate))
+    )
+    wav_io = io.BytesIO()
+    with wave.open(wav_io, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(frames)
+    return wav_io.getvalue()
+
+def load_fixtures(fixtures_dir):
+    """Return the WAV fixtures to replay in each session"""
+    if fixtures_dir:
+        paths = sorted(glob.glob(os.path.join(fixtures_dir, "*.wav")))
+        if not paths:
+            raise SystemExit(f"No .wav files found in {fixtures_dir}")
+        fixtures = []
+        for path in paths:
+            with open(path, "rb") as wav_file:
+                fixtures.append(wav_file.read())
+        return fixtures
+
+    # Distinct clips, so each one is detected as a new recording
+    return [make_tone_wav(frequency) for frequency in (440, 550, 660)]
+
+def current_rss_mb():
+    """Return the current resident set size of this process in MB (Linux only)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # Fall back to the lifetime peak (KB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def check_streamlit_version():
+    """Exit unless the installed Streamlit is the version this harness supports"""
+    import streamlit
+
+    if streamlit.__version__ != SUPPORTED_STREAMLIT_VERSION:
+        raise SystemExit(
+            f"This load test patches Streamlit internals and supports Streamlit "
+            f"{SUPPORTED_STREAMLIT_VERSION} only (installed: {streamlit.__version__})"
+        )
+
+def start_mock_process(llm_latency, stt_latency, tts_latency):
+    """Start mock_servers.py in a child process and return (process, base URL)"""
+    process = subprocess.Popen(
+        [sys.executable, MOCK_SERVERS_PATH,
+         "--llm-latency", str(llm_latency),
+         "--stt-latency", str(stt_latency),
+         "--tts-latency", str(tts_latency)],
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    # The first line announces the URL, e.g. "... listening on http://127.0.0.1:12345 (...)"
+    line = process.stdout.readline()
+    if "listening on" not in line:
+        process.kill()
+        raise SystemExit(f"Mock servers failed to start: {line.strip()}")
+    return process, line.split("listening on ", 1)[1].split()[0]
+
+def install_mocks(base_url):
+    """Route the app's external services to the mock servers.
+
+    The Runtime and ScriptCache patches depend on Streamlit internals and are
+    only known to work with SUPPORTED_STREAMLIT_VERSION. Returns the patchers,
+    which must be stopped after the run.
+    """
+    from streamlit import config, logger
+
+    # Sessions touch session state from outside a script run, and each access
+    # logs a "missing ScriptRunContext" warning. Keep only errors. Parse the
+    # config first, since Streamlit applies logger.level once it is parsed.
+    config.get_config_options()
+    config.set_option("logger.level", "error")
+    logger.set_log_level("error")
+
+    import audio_recorder_streamlit
+    import gtts
+    import speech_recognition as sr
+    import streamlit as st
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    # AppTest installs a mock Runtime singleton for each run and clears it when
+    # the run ends, which would pull it out from under concurrent sessions.
+    # Pin the first one and serve every session from it, as a real server
+    # process has a single runtime. Sessions therefore share its media file
+    # manager and caches instead of getting a fresh mock per run.
+    pinned_runtime = []
+
+    def pinned_instance():
+        if not pinned_runtime and Runtime._instance is not None:
+            pinned_runtime.append(Runtime._instance)
+        if not pinned_runtime:
+            raise RuntimeError("Runtime hasn't been created!")
+        return pinned_runtime[0]
+
+    def pinned_exists():
+        return Runtime._instance is not None or bool(pinned_runtime)
+
+    # AppTest also toggles this option around each run; set it for the whole test
+    config.set_option("global.appTest", True)
+
+    # AppTest compiles the script on every run with a fresh cache, and parallel
+    # compiles can crash CPython 3.11. A real server shares one script cache.
+    original_get_bytecode = ScriptCache.get_bytecode
+    bytecode_cache = {}
+    bytecode_lock = threading.Lock()
+
+    def shared_get_bytecode(self, script_path):
+        with bytecode_lock:
+            if script_path not in bytecode_cache:
+                bytecode_cache[script_path] = original_get_bytecode(self, script_path)
+            return bytecode_cache[script_path]
+
+    def replay_recording(**kwargs):
+        # Each session stores the clip to "record" in its own session state
+        return st.session_state.get("loadtest_audio")
+
+    def recognize_with_mock(self, audio_data, language=None, **kwargs):
+        response = requests.post(f"{base_url}/stt", data=audio_data.get_wav_data(), timeout=30)
+        response.raise_for_status()
+        return response.json()["transcript"]
+
+    def stream_from_mock(self):
+        # gTTS requests long text in 100 character parts
+        for start in range(0, len(self.text), 100):
+            response = requests.get(f"{base_url}/tts", params={"q": self.text[start:start + 100]}, timeout=30)
+            response.raise_for_status()
+            yield response.content
+
+    patchers = [
+        mock.patch.object(Runtime, "instance", pinned_instance),
+        mock.patch.object(Runtime, "exists", pinned_exists),
+        mock.patch.object(ScriptCache, "get_bytecode", shared_get_bytecode),
+        mock.patch.object(audio_recorder_streamlit, "audio_recorder", replay_recording),
+        mock.patch.object(sr.Recognizer, "recognize_google", recognize_with_mock),
+        mock.patch.object(gtts.gTTS, "stream", stream_from_mock),
+        mock.patch.dict(os.environ, {"HF_API_URL": f"{base_url}/llm"})
+    ]
+    for patcher in patchers:
+        patcher.start()
+    return patchers
+
+def run_session(fixtures, chat_inputs, timeout):
+    """Drive one simulated session; return (turn latencies in seconds, error count)"""
+    from streamlit.testing.v1 import AppTest
+
+    latencies = []
+    errors = 0
+
+    def timed_run(element_or_app):
+        nonlocal errors
+        start = time.perf_counter()
+        app = element_or_app.run(timeout=timeout)
+        latencies.append(time.perf_counter() - start)
+        if app.exception:
+            errors += 1
+        return app
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+
+    for clip in fixtures:
+        # Voice turn: new recording triggers transcription, then send the transcript
+        at.session_state["loadtest_audio"] = clip
+        timed_run(at)
+        send_buttons = [button for button in at.button if button.label == SEND_VOICE_LABEL]
+        if not send_buttons:
+            errors += 1
+            continue
+        timed_run(send_buttons[0].click())
+
+    for text in chat_inputs:
+        timed_run(at.chat_input[0].set_value(text))
+
+    return latencies, errors
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values (nearest rank)"""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+def run_level(session_count, fixtures, chat_inputs, timeout):
+    """Run session_count sessions concurrently and return the aggregated metrics"""
+    peak_rss = [current_rss_mb()]
+    stop_sampling = threading.Event()
+
+    def sample_rss():
+        while not stop_sampling.wait(0.1):
+            peak_rss[0] = max(peak_rss[0], current_rss_mb())
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+
+    latencies = []
+    errors = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=session_count) as pool:
+        futures = [pool.submit(run_session, fixtures, chat_inputs, timeout) for _ in range(session_count)]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                session_latencies, session_errors = future.result()
+                latencies.extend(session_latencies)
+                errors += session_errors
+            except Exception:
+                errors += 1
+
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+    stop_sampling.set()
+    sampler.join()
+
+    return {
+        "sessions": session_count,
+        "turns": len(latencies),
+        "errors": errors,
+        "wall_s": wall_time,
+        "throughput_turns_per_s": len(latencies) / wall_time if wall_time else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else None,
+        "cpu_percent": cpu_time / wall_time * 100 if wall_time else 0.0,
+        "peak_rss_mb": peak_rss[0]
+    }
+
+def format_ms(value):
+    """Format a latency in ms, or a dash if there were no turns"""
+    return f"{value:.0f}" if value is not None else "-"
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the voice chatbot with simulated sessions")
+    parser.add_argument("--sessions", default="1,10,50,100",
+                        help="Comma-separated concurrent session counts to test (default: 1,10,50,100)")
+    parser.add_argument("--fixtures", help="Directory of recorded .wav clips to replay (default: synthetic tones)")
+    parser.add_argument("--chat-inputs", type=int, default=len(DEFAULT_CHAT_INPUTS),
+                        help="Number of typed chat turns per session")
+    parser.add_argument("--mock-url", help="Use mock servers already running at this URL instead of starting them")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Mock LLM latency in seconds")
+    parser.add_argument("--stt-latency", type=float, default=0.1, help="Mock speech recognition latency in seconds")
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="Mock TTS latency per text part in seconds")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout for a single script run in seconds")
+    parser.add_argument("--json", help="Write the results to this file for regression tracking")
+    args = parser.parse_args()
+
+    check_streamlit_version()
+
+    session_counts = [int(count) for count in args.sessions.split(",")]
+    fixtures = load_fixtures(args.fixtures)
+    chat_inputs = [DEFAULT_CHAT_INPUTS[i % len(DEFAULT_CHAT_INPUTS)] for i in range(args.chat_inputs)]
+
+    # Serve the mocks from another process so they don't count towards CPU and RSS
+    mock_process = None
+    if args.mock_url:
+        base_url = args.mock_url.rstrip("/")
+    else:
+        mock_process, base_url = start_mock_process(args.llm_latency, args.stt_latency, args.tts_latency)
+    patchers = install_mocks(base_url)
+
+    results = []
+    try:
+        print(f"{'sessions':>8}  {'turns':>6}  {'errors':>6}  {'turns/s':>8}  {'p50 ms':>7}  "
+              f"{'p95 ms':>7}  {'p99 ms':>7}  {'CPU %':>6}  {'RSS MB':>7}")
+        for session_count in session_counts:
+            result = run_level(session_count, fixtures, chat_inputs, args.timeout)
+            results.append(result)
+            print(f"{result['sessions']:>8}  {result['turns']:>6}  {result['errors']:>6}  "
+                  f"{result['throughput_turns_per_s']:>8.1f}  {format_ms(result['p50_ms']):>7}  "
+                  f"{format_ms(result['p95_ms']):>7}  {format_ms(result['p99_ms']):>7}  "
+                  f"{result['cpu_percent']:>6.0f}  {result['peak_rss_mb']:>7.0f}", flush=True)
+    finally:
+        for patcher in reversed(patchers):
+            patcher.stop()
+        if mock_process is not None:
+            mock_process.terminate()
+            mock_process.wait()
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Shared fixtures: mock STT/LLM/TTS servers in a separate process."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+MOCK_SERVERS_PATH = os.path.join(REPO_ROOT, "loadtest", "mock_servers.py")
+
+# Every LLM and TTS request blocks this long (seconds), far longer than any
+# test waits, so a request that finishes early can only have been cancelled
+MOCK_LATENCY = 30
+
+@pytest.fixture(scope="session")
+def mock_url():
+    """Base URL of mock servers whose LLM and TTS endpoints block for MOCK_LATENCY"""
+    process = subprocess.Popen(
+        [sys.executable, MOCK_SERVERS_PATH,
+         "--llm-latency", str(MOCK_LATENCY),
+         "--stt-latency", "0",
+         "--tts-latency", str(MOCK_LATENCY)],
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    line = process.stdout.readline()
+    try:
+        assert "listening on" in line, f"Mock servers failed to start: {line!r}"
+        yield line.split("listening on ", 1)[1].split()[0]
+    finally:
+        process.terminate()
+        process.wait()
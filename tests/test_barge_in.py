@@ -0,0 +1,96 @@
+"""A new recording must interrupt a turn whose reply is still being requested."""
+import io
+import os
+import threading
+import time
+import wave
+
+import audio_recorder_streamlit
+import speech_recognition as sr
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from streamlit.runtime.scriptrunner import RerunData, get_script_run_ctx
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+from conftest import MOCK_LATENCY, REPO_ROOT
+
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+
+# The interrupted run has to end well within this many seconds
+BARGE_IN_DEADLINE = 3
+
+def make_recording(duration=1.0, sample_rate=16000):
+    """Return a silent mono WAV clip"""
+    wav_io = io.BytesIO()
+    with wave.open(wav_io, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b"\x00\x00" * int(duration * sample_rate))
+    return wav_io.getvalue()
+
+def current_fragment_id():
+    """ID of the fragment being rendered, or None in the main script"""
+    ctx = get_script_run_ctx()
+    if hasattr(ctx, "current_fragment_id"):
+        return ctx.current_fragment_id
+    # Newer Streamlit releases keep it in per-thread fragment state
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ThreadState
+    return ThreadState.get().fragment_id
+
+def job_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("voice-job")]
+
+def test_new_recording_cancels_in_flight_reply(mock_url, monkeypatch):
+    monkeypatch.setenv("HF_API_URL", mock_url + "/llm")
+    monkeypatch.setattr(sr.Recognizer, "recognize_google", lambda self, audio, language=None: "Tell me about the sea")
+
+    # Stand in for the recorder, noting which fragment (if any) renders it
+    recorder = {"value": None, "fragment_id": None}
+
+    def fake_audio_recorder(**kwargs):
+        recorder["fragment_id"] = current_fragment_id()
+        return recorder["value"]
+
+    monkeypatch.setattr(audio_recorder_streamlit, "audio_recorder", fake_audio_recorder)
+
+    runners = []
+    original_init = LocalScriptRunner.__init__
+
+    def capture_runner(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        runners.append(self)
+
+    monkeypatch.setattr(LocalScriptRunner, "__init__", capture_runner)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=MOCK_LATENCY / 2)
+    at.run()
+
+    def record_during_reply():
+        # Wait until the reply is being requested from the mock LLM
+        while not job_threads():
+            time.sleep(0.01)
+        recorder["value"] = make_recording()
+        # The browser scopes a widget's rerun to the fragment rendering it
+        runners[-1].request_rerun(RerunData(
+            widget_states=WidgetStates(),
+            fragment_id=recorder["fragment_id"]
+        ))
+
+    recording_thread = threading.Thread(target=record_during_reply)
+    recording_thread.start()
+
+    start = time.monotonic()
+    at.chat_input[0].set_value("Hello").run()
+    elapsed = time.monotonic() - start
+    recording_thread.join()
+
+    assert elapsed < BARGE_IN_DEADLINE
+    assert not at.exception
+    # The interrupted turn left nothing behind and the recording was handled
+    assert at.session_state.messages == []
+    assert at.session_state.voice_text == "Tell me about the sea"
+
+    for thread in job_threads():
+        thread.join(timeout=BARGE_IN_DEADLINE)
+    assert not job_threads()
@@ -0,0 +1,63 @@
+"""Cancelling a job must end a blocked request read and let the job thread exit."""
+import threading
+import time
+from unittest import mock
+
+import gtts.tts
+import pytest
+import requests
+from gtts import gTTS, gTTSError
+
+from cancellation import start_job
+from conftest import MOCK_LATENCY
+
+# How long to let a request reach the blocking read before cancelling it
+REQUEST_START_DELAY = 0.5
+
+# Cancellation has to finish well within this many seconds
+CANCEL_DEADLINE = 2
+
+def post_completion(url, job):
+    """Blocking LLM request as app.request_completion makes it"""
+    job.thread = threading.current_thread()
+    with requests.post(url, data=b'{"inputs": []}', stream=True, timeout=MOCK_LATENCY * 2) as response:
+        return response.status_code, response.content
+
+def stream_speech(job):
+    """Blocking gTTS request as app.synthesize_speech makes it"""
+    job.thread = threading.current_thread()
+    return b"".join(gTTS(text="Hello there", lang="en").stream())
+
+def assert_cancelled_quickly(future, job, error):
+    """Cancel a running job and check that its request fails with error and its thread ends"""
+    time.sleep(REQUEST_START_DELAY)
+    assert not future.done(), "request finished before it could be cancelled"
+
+    start = time.monotonic()
+    job.cancel()
+    with pytest.raises(error):
+        future.result(timeout=CANCEL_DEADLINE)
+    assert time.monotonic() - start < CANCEL_DEADLINE
+
+    job.thread.join(timeout=CANCEL_DEADLINE)
+    assert not job.thread.is_alive()
+
+def test_cancel_aborts_blocked_post(mock_url):
+    future, job = start_job(post_completion, mock_url + "/llm")
+    assert_cancelled_quickly(future, job, requests.exceptions.ConnectionError)
+
+def test_cancel_aborts_blocked_gtts_read(mock_url):
+    with mock.patch.object(gtts.tts, "_translate_url", lambda tld="com", path="": mock_url + "/tts"):
+        future, job = start_job(stream_speech)
+        assert_cancelled_quickly(future, job, gTTSError)
+
+def test_connection_opened_after_cancel_is_aborted(mock_url):
+    def post_after_cancel(url, job):
+        job.cancel()
+        return post_completion(url, job)
+
+    future, job = start_job(post_after_cancel, mock_url + "/llm")
+    with pytest.raises(requests.exceptions.ConnectionError):
+        future.result(timeout=CANCEL_DEADLINE)
+    job.thread.join(timeout=CANCEL_DEADLINE)
+    assert not job.thread.is_alive()